@@ -3,18 +3,20 @@ import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from io import BytesIO
-from chatbot import configure_gemini, ask_gemini
-import os
-
-
-# Gemini SDK
-import google.generativeai as genai
 
 # Local modules
-from services.finance_api import fetch_financials_and_history
+# (plotly, yfinance via services.finance_api, and the Gemini SDK via chatbot are
+# imported lazily where first used so the initial page paints without them)
 from utils.ratio_calculator import compute_ratios_df
+from utils.ui_config import (
+    FREQUENCY_OPTIONS,
+    HISTORY_PERIOD_OPTIONS,
+    HISTORY_INTERVAL_OPTIONS,
+    RATIO_METRICS,
+    PERCENT_RATIOS,
+    RATIO_COLUMN_CONFIG,
+    SUMMARY_RULES,
+)
 
 # Optional: UI helpers (streamlit_shadcn_ui is optional; fallback to basic streamlit if not installed)
 try:
@@ -24,18 +26,43 @@ except Exception:
 
 st.set_page_config(page_title="📊 Financial Statement Analyzer", layout="wide", initial_sidebar_state="expanded")
 
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_ratios(financials: pd.DataFrame, balance: pd.DataFrame) -> pd.DataFrame:
+    """compute_ratios_df memoized across reruns; Streamlit hashes the frames by content.
+    Keyed on content rather than id(): ids are reused once a frame is garbage collected."""
+    return compute_ratios_df(financials, balance)
+
+
+@st.cache_data(show_spinner=False)
+def _formatted_ratios(ratios_df: pd.DataFrame) -> pd.DataFrame:
+    """Scale and round ratio columns once; numeric columns ship to the frontend as Arrow."""
+    display_df = ratios_df.drop(columns="Period_parsed")
+    display_df[PERCENT_RATIOS] = display_df[PERCENT_RATIOS] * 100
+    return display_df.round(2)
+
+
+def _latest_row(ratios_df: pd.DataFrame) -> pd.Series:
+    """Return the most recent period's row via a linear idxmax/argmax scan (no full sort)."""
+    # Period_parsed is computed once by compute_ratios_df
+    if ratios_df["Period_parsed"].notna().any():
+        return ratios_df.loc[ratios_df["Period_parsed"].idxmax()]
+    # fallback if not datetime — pick the lexicographically largest label
+    return ratios_df.iloc[int(np.argmax(ratios_df["Period"].to_numpy(dtype=str)))]
+
+
 HEADER_HTML = "<h1 style='text-align:center;'>📊 Financial Statement Analyzer</h1>"
+SUBHEADER_HTML = "<p style='text-align:center; color:gray;'>Enter a ticker to fetch financials, compute ratios and visualize trends.</p>"
 st.markdown(HEADER_HTML, unsafe_allow_html=True)
-st.markdown("<p style='text-align:center; color:gray;'>Enter a ticker to fetch financials, compute ratios and visualize trends.</p>",
-            unsafe_allow_html=True)
+st.markdown(SUBHEADER_HTML, unsafe_allow_html=True)
 
 # Sidebar inputs
 with st.sidebar:
     st.header("Query")
     ticker_input = st.text_input("Ticker (e.g. AAPL, TSLA, INFY.NS)", value="")
-    period = st.selectbox("Financials frequency", options=["annual", "quarterly"], index=0)
-    hist_period = st.selectbox("Price history period", options=["1y", "2y", "5y", "10y"], index=0)
-    hist_interval = st.selectbox("Price interval", options=["1d", "1wk", "1mo"], index=0)
+    period = st.selectbox("Financials frequency", options=FREQUENCY_OPTIONS, index=0)
+    hist_period = st.selectbox("Price history period", options=HISTORY_PERIOD_OPTIONS, index=0)
+    hist_interval = st.selectbox("Price interval", options=HISTORY_INTERVAL_OPTIONS, index=0)
     act = st.button("Fetch & Analyze")
 
 st.info("Tip: use ticker symbols like AAPL, MSFT, TSLA or NSE tickers like INFY.NS")
@@ -43,7 +70,14 @@ st.info("Tip: use ticker symbols like AAPL, MSFT, TSLA or NSE tickers like INFY.
 if not ticker_input:
     st.stop()
 
-if act:
+# Fetched data and derived artifacts live in session_state so chatbot reruns
+# (st.rerun after every message) don't re-fetch or recompute anything.
+cache_key = (ticker_input, period, hist_period, hist_interval)
+
+if act and st.session_state.get("cached_key") != cache_key:
+    import plotly.graph_objects as go
+    from services.finance_api import fetch_financials_and_history
+
     with st.spinner(f"Fetching data for {ticker_input}..."):
         try:
             # Fetch financial statements and price history
@@ -54,11 +88,38 @@ if act:
             st.error(f"Failed to fetch data: {e}")
             st.stop()
 
+    # Compute ratios (returns DataFrame with Period + computed ratios)
+    ratios_error = None
+    try:
+        ratios_df = _cached_ratios(fin_data.get("financials"), fin_data.get("balance_sheet"))
+    except Exception as e:
+        ratios_error = f"Failed to compute ratios: {e}"
+        ratios_df = None
+
+    # Price history chart
+    history_df = fin_data.get("history")
+    fig2 = None
+    if history_df is not None and not history_df.empty:
+        fig2 = go.Figure()
+        # WebGL trace: one draw call instead of an SVG node per point on long daily histories
+        fig2.add_trace(go.Scattergl(x=history_df.index, y=history_df["Close"].values, mode="lines", name="Close"))
+        fig2.update_layout(title=f"{ticker_input} Close Price ({hist_period})", xaxis_title="Date", yaxis_title="Price", template="plotly_white")
+
+    st.session_state["fin_data"] = fin_data
+    st.session_state["ratios_df"] = ratios_df
+    st.session_state["ratios_error"] = ratios_error
+    st.session_state["fig_price"] = fig2
+    st.session_state["fig_ratios"] = {}  # keyed by tuple of plotted metrics
+    st.session_state["cached_key"] = cache_key
+
+if st.session_state.get("cached_key") == cache_key:
+    fin_data = st.session_state["fin_data"]
+    ratios_df = st.session_state["ratios_df"]
+
     # Unpack
     financials_df = fin_data.get("financials")      # DataFrame (periods as cols)
     balance_df = fin_data.get("balance_sheet")
     cashflow_df = fin_data.get("cashflow")
-    history_df = fin_data.get("history")           # historical prices
 
     # Header row with company info
     company_name = fin_data.get("info", {}).get("longName") or ticker_input
@@ -79,78 +140,61 @@ if act:
 
     st.markdown("---")
 
-    # Show raw frames (transpose to have periods as rows)
-    st.markdown("### Financials & Balance Sheet (preview)")
-    cols_show = st.columns(2)
-    with cols_show[0]:
-        st.write("Income Statement")
+    # Statement previews and computed ratios share one tab group
+    # (statements are transposed to have periods as rows)
+    st.markdown("### Financial Statements & Ratios")
+    tab_income, tab_balance, tab_ratios = st.tabs(["Income Statement", "Balance Sheet", "Computed Ratios"])
+    with tab_income:
         if financials_df is None or financials_df.empty:
             st.warning("No income statement data available.")
         else:
-            # Transpose so periods become rows
-            st.dataframe(financials_df.T.head(8))
+            # Slice the first 8 periods, then transpose so periods become rows
+            st.dataframe(financials_df.iloc[:, :8].T)
 
-    with cols_show[1]:
-        st.write("Balance Sheet")
+    with tab_balance:
         if balance_df is None or balance_df.empty:
             st.warning("No balance sheet data available.")
         else:
-            st.dataframe(balance_df.T.head(8))
+            st.dataframe(balance_df.iloc[:, :8].T)
 
-    # Compute ratios (returns DataFrame with Period + computed ratios)
-    st.markdown("### Computed Ratios")
-    try:
-        ratios_df = compute_ratios_df(financials_df, balance_df)
-    except Exception as e:
-        st.error(f"Failed to compute ratios: {e}")
-        ratios_df = None
+    with tab_ratios:
+        if st.session_state.get("ratios_error"):
+            st.error(st.session_state["ratios_error"])
 
-    if ratios_df is not None and not ratios_df.empty:
-        # Format display
-        styled = ratios_df.copy()
-        # Convert percent columns for nicer display
-        st.dataframe(
-            styled.style.format({
-                "ROA": "{:.2%}",
-                "ROE": "{:.2%}",
-                "Current Ratio": "{:.2f}",
-                "Quick Ratio": "{:.2f}"
-            }),
-            use_container_width=True
-        )
+        if ratios_df is not None and not ratios_df.empty:
+            # Convert percent columns for nicer display
+            st.dataframe(_formatted_ratios(ratios_df), column_config=RATIO_COLUMN_CONFIG, use_container_width=True)
 
-        csv_buf = BytesIO()
-        styled.to_csv(csv_buf, index=False)
-        st.download_button("Download ratios CSV", csv_buf.getvalue(), file_name=f"{ticker_input}_ratios.csv", mime="text/csv")
+            csv_bytes = ratios_df.drop(columns="Period_parsed").to_csv(index=False).encode("utf-8")
+            st.download_button("Download ratios CSV", csv_bytes, file_name=f"{ticker_input}_ratios.csv", mime="text/csv")
+        else:
+            st.info("Ratios not available for this company / period.")
 
+    if ratios_df is not None and not ratios_df.empty:
         # Plots
         st.markdown("#### Ratio trends")
-        metrics = ["ROA", "ROE", "Current Ratio", "Quick Ratio"]
-        chosen = st.multiselect("Metrics to plot", options=metrics, default=metrics)
-
-        if chosen:
-            plot_df = ratios_df.melt(id_vars=["Period"], value_vars=chosen, var_name="Metric", value_name="Value")
-            # Plotly line chart grouped by Metric
-            fig = go.Figure()
-            for metric in plot_df["Metric"].unique():
-                dfm = plot_df[plot_df["Metric"] == metric]
-                fig.add_trace(go.Scatter(x=dfm["Period"], y=dfm["Value"], mode="lines+markers", name=metric))
-            fig.update_layout(title="Ratio Trends", xaxis_title="Period", yaxis_title="Value", template="plotly_white")
+        chosen = st.multiselect("Metrics to plot", options=RATIO_METRICS, default=RATIO_METRICS)
+
+        fig_cache = st.session_state["fig_ratios"]
+        if chosen and tuple(chosen) in fig_cache:
+            st.plotly_chart(fig_cache[tuple(chosen)], use_container_width=True)
+        elif chosen:
+            import plotly.express as px
+
+            # Plotly Express builds one trace per wide column, no melt needed
+            fig = px.line(ratios_df, x="Period", y=chosen, markers=True, template="plotly_white", title="Ratio Trends",
+                          labels={"value": "Value", "variable": "Metric"})
+            fig_cache[tuple(chosen)] = fig
             st.plotly_chart(fig, use_container_width=True)
 
-    else:
-        st.info("Ratios not available for this company / period.")
-
     st.markdown("---")
 
     # Price history chart
     st.markdown("### Historical Price")
-    if history_df is None or history_df.empty:
+    fig2 = st.session_state["fig_price"]
+    if fig2 is None:
         st.warning("No historical price available.")
     else:
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=history_df.index, y=history_df["Close"], mode="lines", name="Close"))
-        fig2.update_layout(title=f"{ticker_input} Close Price ({hist_period})", xaxis_title="Date", yaxis_title="Price", template="plotly_white")
         st.plotly_chart(fig2, use_container_width=True)
 
     # Basic diagnostics
@@ -174,64 +218,15 @@ if act:
     if ratios_df is not None and not ratios_df.empty:
         try:
             # --- Select the most recent period/year ---
-            # Ensure Period column exists and is sorted properly
-            if "Period" in ratios_df.columns:
-                try:
-                    ratios_df["Period_parsed"] = pd.to_datetime(ratios_df["Period"], errors="coerce")
-                    latest_row = ratios_df.sort_values(by="Period_parsed", ascending=False).iloc[0]
-                except Exception:
-                    # fallback if not datetime — try sorting lexicographically
-                    latest_row = ratios_df.sort_values(by="Period", ascending=False).iloc[0]
-            else:
-                # fallback if Period column missing
-                latest_row = ratios_df.iloc[-1]
-
+            latest_row = _latest_row(ratios_df)
             latest = latest_row.to_dict()
 
-            current_ratio = latest.get("Current Ratio")
-            quick_ratio = latest.get("Quick Ratio")
-            roa = latest.get("ROA")
-            roe = latest.get("ROE")
-
             summary = []
-
-            # --- Current Ratio ---
-            if current_ratio is not None and not pd.isna(current_ratio):
-                if current_ratio > 1:
-                    summary.append(f"✅ **Current Ratio ({current_ratio:.2f})** indicates a strong ability to meet short-term obligations using current assets.")
-                elif current_ratio < 1:
-                    summary.append(f"⚠️ **Current Ratio ({current_ratio:.2f})** suggests possible liquidity issues as liabilities exceed current assets.")
-                else:
-                    summary.append(f"ℹ️ **Current Ratio ({current_ratio:.2f})** is at threshold; liquidity position is adequate but could improve.")
-
-            # --- Quick Ratio ---
-            if quick_ratio is not None and not pd.isna(quick_ratio):
-                if quick_ratio > 1:
-                    summary.append(f"✅ **Quick Ratio ({quick_ratio:.2f})** shows strong liquidity even without relying on inventory.")
-                elif quick_ratio < 1:
-                    summary.append(f"⚠️ **Quick Ratio ({quick_ratio:.2f})** indicates potential short-term cash flow risk if inventory is slow moving.")
-                else:
-                    summary.append(f"ℹ️ **Quick Ratio ({quick_ratio:.2f})** suggests moderate liquidity, borderline case.")
-
-            # --- ROA ---
-            if roa is not None and not pd.isna(roa):
-                if roa >= 0.10:
-                    summary.append(f"✅ **ROA ({roa:.2%})** shows excellent operational efficiency and effective use of assets.")
-                elif roa < 0.05:
-                    summary.append(f"⚠️ **ROA ({roa:.2%})** indicates weak efficiency in using assets to generate profit.")
-                else:
-                    summary.append(f"ℹ️ **ROA ({roa:.2%})** is moderate, showing average asset utilization.")
-
-            # --- ROE ---
-            if roe is not None and not pd.isna(roe):
-                if roe > 0.15:
-                    summary.append(f"✅ **ROE ({roe:.2%})** reflects excellent profitability and strong returns for shareholders.")
-                elif 0.05 <= roe <= 0.10:
-                    summary.append(f"ℹ️ **ROE ({roe:.2%})** indicates average profitability; potential exists for improvement.")
-                elif roe < 0.05:
-                    summary.append(f"⚠️ **ROE ({roe:.2%})** is poor, showing low returns on shareholder equity.")
-                else:
-                    summary.append(f"✅ **ROE ({roe:.2%})** is good, showing consistent performance.")
+            for name, thresholds, messages, fmt in SUMMARY_RULES:
+                val = latest.get(name)
+                if val is not None and not pd.isna(val):
+                    idx = int(np.searchsorted(thresholds, val, side="right"))
+                    summary.append(messages[idx].format(fmt.format(val)))
 
             # --- Final Display ---
             if summary:
@@ -245,15 +240,9 @@ if act:
     else:
         st.info("Financial ratios unavailable — cannot generate overall analysis summary.")
 
-    st.markdown("----")
-    st.markdown("## 💬 Ask the AI Chatbot")
-
-    # ---------------------------
+# ---------------------------
 # Conversational Chatbot Integration (fixed: safe clearing of input)
 # ---------------------------
-from chatbot import configure_gemini, ask_gemini
-import os
-
 st.markdown("----")
 st.markdown("## 💬 AI Chatbot (conversational)")
 
@@ -267,6 +256,8 @@ elif "GEMINI_API_KEY" in os.environ:
 if not api_key:
     st.warning("⚠️ Gemini API key not found. Add GEMINI_API_KEY to .streamlit/secrets.toml or export it as an environment variable to enable the chatbot.")
 else:
+    from chatbot import configure_gemini, start_session, ask_session
+
     # configure gemini once
     try:
         configure_gemini(api_key)
@@ -322,12 +313,23 @@ if api_key:
             # Build context from latest ratios and KPIs
             if "ratios_df" in locals() and ratios_df is not None and not ratios_df.empty:
                 try:
-                    context_row = latest_row if "latest_row" in locals() else ratios_df.sort_values(by="Period", ascending=False).iloc[0]
+                    context_row = latest_row if "latest_row" in locals() else _latest_row(ratios_df)
                 except Exception:
                     context_row = ratios_df.iloc[-1]
-                context_text = "\n".join([f"{k}: {v}" for k, v in context_row.to_dict().items()])
+                # Only the KPI columns, as plain Python scalars (NaN -> None) so the
+                # context serializes cleanly to JSON and compares equal across reruns
+                context_data = {"Period": str(context_row.get("Period", "Most Recent"))}
+                for k in RATIO_METRICS:
+                    v = context_row.get(k)
+                    context_data[k] = float(v) if v is not None and pd.notna(v) else None
             else:
-                context_text = "No ratio data available."
+                context_data = "No ratio data available."
+
+            # (Re)start the Gemini chat session when the company context changes,
+            # seeding it with the conversation so far
+            if "gemini_chat" not in st.session_state or st.session_state.get("gemini_context") != context_data:
+                st.session_state["gemini_chat"] = start_session(context=context_data, chat_history=st.session_state["chat_history"])
+                st.session_state["gemini_context"] = context_data
 
             # Append user message to history
             st.session_state["chat_history"].append({"role": "user", "content": user_question})
@@ -335,7 +337,7 @@ if api_key:
             # Call the chatbot (network call may take time)
             with st.spinner("Analyzing with Gemini..."):
                 try:
-                    ai_reply = ask_gemini(user_query=user_question, context=context_text, chat_history=st.session_state["chat_history"])
+                    ai_reply = ask_session(st.session_state["gemini_chat"], user_question)
                 except Exception as e:
                     st.error(f"Chatbot error: {e}")
                     ai_reply = None
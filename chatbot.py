@@ -1,8 +1,24 @@
 # chatbot.py
 import google.generativeai as genai
 from typing import List, Dict, Optional
+from functools import lru_cache
 import json
 
+# API key the SDK is currently configured with
+_configured_key: Optional[str] = None
+
+SYSTEM_INSTRUCTION = (
+    "You are a precise, professional financial analyst chatbot. "
+    "Use the provided company financial data (KPIs, ratios, and metrics) "
+    "to analyze and answer the user's question factually. "
+    "When possible, cite which metrics you used. "
+    "If specific data (like ROA, ROE, or P/E ratio) is not available, "
+    "still explain the concept clearly — define it, show how it's calculated, "
+    "and give a simple numerical example. "
+    "Avoid saying that data is missing or unavailable; instead, provide helpful context "
+    "based on your financial knowledge."
+)
+
 # ============================================================
 # CONFIGURATION
 # ============================================================
@@ -11,7 +27,28 @@ def configure_gemini(api_key: str):
     Configure the Google Generative AI SDK with the provided API key.
     Call this once at app startup.
     """
+    global _configured_key
+    if api_key == _configured_key:
+        return
     genai.configure(api_key=api_key)
+    # cached models may hold a client bound to the previous key
+    _get_model.cache_clear()
+    _configured_key = api_key
+
+
+@lru_cache(maxsize=4)
+def _get_model(model_name: str, system_instruction: Optional[str] = None):
+    """Return a GenerativeModel, built once per (model name, system instruction)."""
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+def _format_context(context) -> str:
+    # Ensure context is structured
+    if context:
+        if isinstance(context, dict):
+            return json.dumps(context, indent=2)
+        return str(context)
+    return "No financial context provided."
 
 
 # ============================================================
@@ -31,38 +68,22 @@ def _build_prompt(
     - Last few chat history turns
     - Current user query
     """
-    system_instr = (
-        "You are a precise, professional financial analyst chatbot. "
-        "Use the provided company financial data (KPIs, ratios, and metrics) "
-        "to analyze and answer the user's question factually. "
-        "When possible, cite which metrics you used. "
-        "If specific data (like ROA, ROE, or P/E ratio) is not available, "
-        "still explain the concept clearly — define it, show how it's calculated, "
-        "and give a simple numerical example. "
-        "Avoid saying that data is missing or unavailable; instead, provide helpful context "
-        "based on your financial knowledge."
-    )
-
     # Format chat history
     convo_text = ""
     if chat_history:
-        truncated = chat_history[-(max_history_turns * 2):]
-        for msg in truncated:
-            role = "User" if msg.get("role") == "user" else "Assistant"
-            convo_text += f"{role}: {msg.get('content', '')}\n"
+        start = max(0, len(chat_history) - max_history_turns * 2)
+        parts = [
+            f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}"
+            for msg in chat_history[start:]
+        ]
+        # join once instead of += per turn (quadratic on long histories)
+        convo_text = "\n".join(parts) + "\n" if parts else ""
 
-    # Ensure context is structured
-    if context:
-        if isinstance(context, dict):
-            context_str = json.dumps(context, indent=2)
-        else:
-            context_str = str(context)
-    else:
-        context_str = "No financial context provided."
+    context_str = _format_context(context)
 
     # Build final prompt
     prompt = (
-        f"{system_instr}\n\n"
+        f"{SYSTEM_INSTRUCTION}\n\n"
         f"---\n"
         f"📊 Company Financial Data (KPIs & Ratios):\n{context_str}\n"
         f"---\n\n"
@@ -98,7 +119,7 @@ def ask_gemini(
         )
 
         # Initialize model
-        model = genai.GenerativeModel(model_name)
+        model = _get_model(model_name)
 
         # Generate response
         response = model.generate_content(prompt)
@@ -113,3 +134,49 @@ def ask_gemini(
 
     except Exception as e:
         return f"⚠️ Error while communicating with Gemini: {str(e)}"
+
+
+# ============================================================
+# CHAT SESSION
+# ============================================================
+def start_session(
+    context: Optional[Dict] = None,
+    chat_history: Optional[List[Dict]] = None,
+    model_name: str = "gemini-2.0-flash",
+    max_history_turns: int = 6
+):
+    """
+    Start a Gemini chat session with the company context baked into the
+    system instruction, seeded with the last max_history_turns turns.
+    Keep the returned session (e.g. in st.session_state) and call ask_session
+    for each new question. Start a new session whenever the context changes.
+    """
+    system_instruction = (
+        f"{SYSTEM_INSTRUCTION}\n\n"
+        f"📊 Company Financial Data (KPIs & Ratios):\n{_format_context(context)}"
+    )
+    history = [
+        {"role": "user" if msg.get("role") == "user" else "model", "parts": [msg.get("content", "")]}
+        for msg in (chat_history or [])[-(max_history_turns * 2):]
+    ]
+    model = _get_model(model_name, system_instruction)
+    return model.start_chat(history=history)
+
+
+def ask_session(chat, user_query: str, max_history_turns: int = 6) -> str:
+    """
+    Send a question through an existing chat session and return the reply.
+    The session keeps history client-side and resends it with every message,
+    so it is trimmed to the last max_history_turns turns first (as _build_prompt does).
+    """
+    try:
+        if len(chat.history) > max_history_turns * 2:
+            chat.history = chat.history[-(max_history_turns * 2):]
+        response = chat.send_message(user_query)
+
+        if hasattr(response, "text") and response.text:
+            return response.text.strip()
+        return "⚠️ No response received from Gemini."
+
+    except Exception as e:
+        return f"⚠️ Error while communicating with Gemini: {str(e)}"
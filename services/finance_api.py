@@ -7,54 +7,158 @@ Return a dict with keys:
 - cashflow (DataFrame)     : cashflow statement
 - history (DataFrame)      : price history (index = DatetimeIndex)
 - info (dict)              : ticker.info metadata
+
+Results are cached in memory (per Streamlit process) and on disk under `.cache/`
+so repeat sessions skip the Yahoo round trips.
 """
 
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Optional
 import pandas as pd
+import streamlit as st
 import yfinance as yf
 
+# On-disk cache location and time-to-live (seconds)
+_CACHE_DIR = ".cache"
+_CACHE_TTL = 24 * 60 * 60
+
+# Overall deadline (seconds) shared by the concurrent yfinance requests
+_FETCH_TIMEOUT = 15
+
+def _cache_path(ticker: str, frequency: str, history_period: str, history_interval: str) -> str:
+    # The file is named by the hash alone: the ticker is user input and must never
+    # become a path component (e.g. "../X" or "/TMP/X" would escape _CACHE_DIR)
+    key = hashlib.md5(f"{ticker}|{frequency}|{history_period}|{history_interval}".encode()).hexdigest()
+    return os.path.join(_CACHE_DIR, f"{key}.pkl")
+
+
+def _load_cached(path: str) -> Optional[Dict]:
+    """Return the pickled result at path if it exists and is younger than the TTL."""
+    try:
+        if time.time() - os.path.getmtime(path) > _CACHE_TTL:
+            return None
+    except OSError:
+        return None
+    try:
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+    except Exception:
+        # Unreadable entry, e.g. a pickle referencing classes from an older pandas:
+        # drop it so the refetch can replace it instead of failing until the TTL
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+
+def _store_cached(path: str, data: Dict) -> None:
+    # the cache is best-effort; a read-only filesystem should not break the fetch
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temp file and swap it in, so concurrent sessions never read a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(data, fh)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except (OSError, pickle.PicklingError):
+        pass
+
 
 def _safe_df(df: Optional[pd.DataFrame]) -> pd.DataFrame:
     if df is None:
         return pd.DataFrame()
-    # yfinance returns DataFrames with Periods as columns (DatetimeIndex-like)
-    return df.fillna(pd.NA)
+    # yfinance returns DataFrames with Periods as columns (DatetimeIndex-like).
+    # Missing values stay NaN: fillna(pd.NA) copied every frame and upcast
+    # float64 rows to object dtype, defeating vectorized ratio math.
+    return df
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_financials_and_history(ticker: str, frequency: str = "annual", history_period: str = "1y", history_interval: str = "1d") -> Dict:
     """
     frequency: 'Annual' or 'Quarterly'
     history_period: '1y', '2y', '5y', '10y', etc.
     history_interval: '1d', '1wk', '1mo'
     """
+    # Normalize once so "aapl" and "AAPL" share the disk cache entry
+    ticker = ticker.strip().upper()
+    path = _cache_path(ticker, frequency, history_period, history_interval)
+    cached = _load_cached(path)
+    if cached is not None:
+        return cached
+
+    # A fresh Ticker per cache miss: yf.Ticker memoizes its own responses, so a
+    # long-lived one would keep serving data the caches above have expired
     t = yf.Ticker(ticker)
-    # info may raise in some cases; protect with try/except
-    try:
-        info = t.info or {}
-    except Exception:
-        info = {}
 
     # yfinance uses attributes: financials (annual), quarterly_financials
-    if frequency == "quarterly":
-        financials = _safe_df(t.quarterly_financials)
-        balance = _safe_df(t.quarterly_balance_sheet)
-        cashflow = _safe_df(t.quarterly_cashflow)
-    else:
-        financials = _safe_df(t.financials)
-        balance = _safe_df(t.balance_sheet)
-        cashflow = _safe_df(t.cashflow)
-
-    # history
+    prefix = "quarterly_" if frequency == "quarterly" else ""
+
+    def _get(attr):
+        return getattr(t, attr)
+
+    # Each attribute is a separate HTTP request; issue them concurrently.
+    # Don't wait on shutdown so a stalled endpoint can't outlive the deadline.
+    ex = ThreadPoolExecutor(max_workers=5)
     try:
-        history = t.history(period=history_period, interval=history_interval)
-    except Exception:
-        history = pd.DataFrame()
+        futures = {
+            "info": ex.submit(_get, "info"),
+            "financials": ex.submit(_get, f"{prefix}financials"),
+            "balance_sheet": ex.submit(_get, f"{prefix}balance_sheet"),
+            "cashflow": ex.submit(_get, f"{prefix}cashflow"),
+            "history": ex.submit(t.history, period=history_period, interval=history_interval),
+        }
+        # one shared deadline for all endpoints, not one timeout per result() call
+        done, _ = wait(futures.values(), timeout=_FETCH_TIMEOUT)
+        results = {}
+        failed = []
+        # any endpoint may raise or stall; collect every failure before deciding
+        for name, future in futures.items():
+            if future not in done:
+                failed.append(f"{name} (timed out)")
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failed.append(f"{name} ({e})")
+    finally:
+        ex.shutdown(wait=False)
 
-    # Return
-    return {
+    # A partial result (e.g. a slow info call or a transient balance-sheet error) would
+    # be kept by st.cache_data and the disk cache; raise instead so a retry refetches
+    if failed:
+        raise RuntimeError(f"Failed to fetch {ticker}: " + ", ".join(failed))
+
+    info = results["info"] or {}
+    financials = _safe_df(results["financials"])
+    balance = _safe_df(results["balance_sheet"])
+    cashflow = _safe_df(results["cashflow"])
+    history = _safe_df(results["history"])
+
+    # Nothing usable came back (typo'd ticker, Yahoo outage or rate limit): raise so
+    # neither st.cache_data nor the disk cache keeps the failure and a retry refetches
+    if financials.empty and history.empty:
+        raise ValueError(f"No financial statements or price history returned for {ticker}")
+
+    result = {
         "financials": financials,
         "balance_sheet": balance,
         "cashflow": cashflow,
         "history": history,
         "info": info,
     }
+
+    _store_cached(path, result)
+
+    # Return
+    return result
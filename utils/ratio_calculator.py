@@ -12,22 +12,58 @@ This module extracts likely rows using heuristics and computes:
 - Quick Ratio = (Current Assets - Inventory) / Current Liabilities
 """
 
+import re
 from typing import Optional
 import pandas as pd
 import numpy as np
 
 
-def _find_row(df: pd.DataFrame, possible_names):
-    """Return a row (Series) matched by any of the names in possible_names (case-insensitively).
-    If not found, return a series of NaNs with appropriate length."""
+def _normalize_labels(labels) -> pd.Index:
+    """Lowercase labels and drop whitespace/underscores, so 'Net Income' and 'NetIncome' compare equal."""
+    return pd.Index(labels).astype(str).str.lower().str.replace(r"[\s_]+", "", regex=True)
+
+
+def _as_numeric(row: pd.Series) -> pd.Series:
+    """Return row as floats; only run the to_numeric coercion for non-numeric (e.g. object) rows.
+    (No copy=False: it's deprecated on pandas 3, where Copy-on-Write already avoids the copy.)"""
+    if row.dtype.kind in "iuf":
+        return row.astype(np.float64)
+    return pd.to_numeric(row, errors="coerce")
+
+
+def _build_lookup(df: Optional[pd.DataFrame]):
+    """Precompute (normalized index, {normalized label: first row position}) for a statement,
+    shared by every _find_row call against it. Returns None for a missing/empty frame."""
     if df is None or df.empty:
         return None
-    lower_index = [str(i).lower() for i in df.index.astype(str)]
-    for name in possible_names:
-        name_l = name.lower()
-        for idx, label in enumerate(lower_index):
-            if name_l == label or name_l in label or label in name_l:
-                return pd.to_numeric(df.iloc[idx], errors="coerce")
+    norm = _normalize_labels(df.index)
+    positions = {}
+    for pos, label in enumerate(norm):
+        positions.setdefault(label, pos)
+    return norm, positions
+
+
+def _find_row(df: pd.DataFrame, lookup, possible_names):
+    """Return a row (Series) matched by any of the names in possible_names (case-insensitively).
+    lookup is _build_lookup(df), computed once by the caller and shared across lookups.
+    An exact label match (earliest candidate first) wins via O(1) dict probes; only when
+    none exists is the index scanned for the first label containing any candidate.
+    If not found, return None."""
+    if lookup is None:
+        return None
+    norm, positions = lookup
+    cand_norm = _normalize_labels(possible_names)
+
+    # fast path: exact hits
+    pos = next((positions[c] for c in cand_norm if c in positions), None)
+    if pos is not None:
+        return _as_numeric(df.iloc[pos])
+
+    # substring hits
+    pat = "|".join(map(re.escape, cand_norm))
+    hits = np.flatnonzero(np.asarray(norm.str.contains(pat, regex=True), dtype=bool))
+    if hits.size:
+        return _as_numeric(df.iloc[hits[0]])
     return None
 
 
@@ -36,6 +72,7 @@ def compute_ratios_df(financials: Optional[pd.DataFrame], balance: Optional[pd.D
     Returns a DataFrame with columns:
     - Period (string)
     - ROA, ROE, Current Ratio, Quick Ratio
+    - Period_parsed (datetime64; NaT where Period isn't a date)
     Period ordering will match the order of columns in input financials/balance.
     """
     # If both are empty, return empty
@@ -47,8 +84,12 @@ def compute_ratios_df(financials: Optional[pd.DataFrame], balance: Optional[pd.D
     if source is None or source.empty:
         return pd.DataFrame()
 
-    # periods as strings
-    periods = [str(c.date() if hasattr(c, "date") else c) for c in source.columns]
+    # periods as strings (yfinance columns are a DatetimeIndex: format them in one pass)
+    cols = source.columns
+    if isinstance(cols, pd.DatetimeIndex):
+        periods = cols.strftime("%Y-%m-%d").tolist()
+    else:
+        periods = cols.astype(str).tolist()
 
     # Extract key rows from financials & balance
     # Candidate names (common variants)
@@ -59,53 +100,64 @@ def compute_ratios_df(financials: Optional[pd.DataFrame], balance: Optional[pd.D
     current_liabilities_names = ["Total Current Liabilities", "Current Liabilities"]
     inventory_names = ["Inventory", "Total Inventory"]
 
-    net_income = _find_row(financials, net_income_names) if financials is not None else None
-    total_assets = _find_row(balance, total_assets_names) if balance is not None else None
-    total_equity = _find_row(balance, total_equity_names) if balance is not None else None
-    current_assets = _find_row(balance, current_assets_names) if balance is not None else None
-    current_liabilities = _find_row(balance, current_liabilities_names) if balance is not None else None
-    inventory = _find_row(balance, inventory_names) if balance is not None else None
+    # Normalize each statement's labels once for all lookups against it
+    fin_lookup = _build_lookup(financials)
+    bal_lookup = _build_lookup(balance)
 
-    # If any series is None, replace with NaN series matching periods length
+    net_income = _find_row(financials, fin_lookup, net_income_names)
+    total_assets = _find_row(balance, bal_lookup, total_assets_names)
+    total_equity = _find_row(balance, bal_lookup, total_equity_names)
+    current_assets = _find_row(balance, bal_lookup, current_assets_names)
+    current_liabilities = _find_row(balance, bal_lookup, current_liabilities_names)
+    inventory = _find_row(balance, bal_lookup, inventory_names)
+
+    # Align each row to source.columns as a float64 ndarray; None becomes all-NaN
     def ensure_length(s):
         if s is None:
-            return pd.Series([np.nan] * len(periods))
-        # coerce to numeric and align to columns order
-        s = pd.to_numeric(s, errors="coerce")
-        # If index and source.columns differ, try to reindex by the source columns
-        try:
-            s = s.reindex(source.columns).astype(float)
-        except Exception:
-            s = pd.Series(s.values, index=source.columns).astype(float)
-        return s.reset_index(drop=True)
-
-    net_income = ensure_length(net_income)
-    total_assets = ensure_length(total_assets)
-    total_equity = ensure_length(total_equity)
-    current_assets = ensure_length(current_assets)
-    current_liabilities = ensure_length(current_liabilities)
-    inventory = ensure_length(inventory)
-
-    # Safe divide
-    with np.errstate(divide="ignore", invalid="ignore"):
-        roa = net_income / total_assets
-        roe = net_income / total_equity
-        current_ratio = current_assets / current_liabilities
-        quick_ratio = (current_assets - inventory) / current_liabilities
-
-    # Replace inf with NaN
-    roa = roa.replace([np.inf, -np.inf], np.nan)
-    roe = roe.replace([np.inf, -np.inf], np.nan)
-    current_ratio = current_ratio.replace([np.inf, -np.inf], np.nan)
-    quick_ratio = quick_ratio.replace([np.inf, -np.inf], np.nan)
-
+            return np.full(len(periods), np.nan)
+        # Rows taken from `source` itself already match; only realign the other statement's rows
+        if s.index.equals(source.columns):
+            vals = s.values
+        else:
+            try:
+                vals = s.reindex(source.columns).values
+            except Exception:
+                vals = s.values
+        return np.asarray(vals, dtype=np.float64)
+
+    # Stack the six aligned rows into one contiguous (6, n_periods) float64 array
+    A = np.vstack([
+        ensure_length(net_income),
+        ensure_length(total_assets),
+        ensure_length(total_equity),
+        ensure_length(current_assets),
+        ensure_length(current_liabilities),
+        ensure_length(inventory),
+    ]).astype(np.float64, copy=False)
+    net_income, total_assets, total_equity, current_assets, current_liabilities, inventory = A
+
+    # All four ratios as one (4, n_periods) divide:
+    # ROA = NI / TA, ROE = NI / TE, Current = CA / CL, Quick = (CA - Inv) / CL
+    numerators = np.vstack([net_income, net_income, current_assets, current_assets - inventory])
+    denominators = A[[1, 2, 4, 4]]
+    # Safe divide: only where both operands are finite and the denominator is non-zero;
+    # every other cell keeps the NaN it was initialized with, so no inf is ever produced
+    ratios = np.full(numerators.shape, np.nan, dtype=np.float64)
+    valid = (denominators != 0) & np.isfinite(denominators) & np.isfinite(numerators)
+    np.divide(numerators, denominators, out=ratios, where=valid)
+    roa, roe, current_ratio, quick_ratio = ratios
+
+    # Built straight from the float64 ndarrays (no intermediate Series); copy=False lets
+    # pandas take them as-is. Period_parsed is parsed once here so callers can pick the
+    # latest period without re-parsing.
     out = pd.DataFrame({
         "Period": periods,
         "ROA": roa,
         "ROE": roe,
         "Current Ratio": current_ratio,
-        "Quick Ratio": quick_ratio
-    })
+        "Quick Ratio": quick_ratio,
+        "Period_parsed": pd.to_datetime(periods, errors="coerce"),
+    }, copy=False)
 
     # Keep ordering as seen in source (most recent first in yfinance)
     return out
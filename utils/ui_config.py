@@ -0,0 +1,55 @@
+# utils/ui_config.py
+"""
+Widget options, display formats and summary rules for the Streamlit UI.
+
+Streamlit re-executes app.py on every rerun, so these live in an imported module:
+it runs once per process (cached in sys.modules) and every rerun reuses the objects.
+"""
+
+import numpy as np
+import streamlit as st
+
+FREQUENCY_OPTIONS = ["annual", "quarterly"]
+HISTORY_PERIOD_OPTIONS = ["1y", "2y", "5y", "10y"]
+HISTORY_INTERVAL_OPTIONS = ["1d", "1wk", "1mo"]
+RATIO_METRICS = ["ROA", "ROE", "Current Ratio", "Quick Ratio"]
+PERCENT_RATIOS = ["ROA", "ROE"]
+RATIO_COLUMN_CONFIG = {
+    "ROA": st.column_config.NumberColumn(format="%.2f%%"),
+    "ROE": st.column_config.NumberColumn(format="%.2f%%"),
+    "Current Ratio": st.column_config.NumberColumn(format="%.2f"),
+    "Quick Ratio": st.column_config.NumberColumn(format="%.2f"),
+}
+
+
+def _just_above(x: float) -> float:
+    """Smallest float greater than x — turns a strict '> x' test into a searchsorted bucket edge."""
+    return float(np.nextafter(x, np.inf))
+
+
+# Overall Analysis Summary rules: (metric, thresholds, messages, value format).
+# thresholds[i] is the lowest value of bucket i + 1, so
+# np.searchsorted(thresholds, value, side="right") indexes messages.
+SUMMARY_RULES = [
+    ("Current Ratio", [1.0, _just_above(1.0)], [
+        "⚠️ **Current Ratio ({})** suggests possible liquidity issues as liabilities exceed current assets.",
+        "ℹ️ **Current Ratio ({})** is at threshold; liquidity position is adequate but could improve.",
+        "✅ **Current Ratio ({})** indicates a strong ability to meet short-term obligations using current assets.",
+    ], "{:.2f}"),
+    ("Quick Ratio", [1.0, _just_above(1.0)], [
+        "⚠️ **Quick Ratio ({})** indicates potential short-term cash flow risk if inventory is slow moving.",
+        "ℹ️ **Quick Ratio ({})** suggests moderate liquidity, borderline case.",
+        "✅ **Quick Ratio ({})** shows strong liquidity even without relying on inventory.",
+    ], "{:.2f}"),
+    ("ROA", [0.05, 0.10], [
+        "⚠️ **ROA ({})** indicates weak efficiency in using assets to generate profit.",
+        "ℹ️ **ROA ({})** is moderate, showing average asset utilization.",
+        "✅ **ROA ({})** shows excellent operational efficiency and effective use of assets.",
+    ], "{:.2%}"),
+    ("ROE", [0.05, _just_above(0.10), _just_above(0.15)], [
+        "⚠️ **ROE ({})** is poor, showing low returns on shareholder equity.",
+        "ℹ️ **ROE ({})** indicates average profitability; potential exists for improvement.",
+        "✅ **ROE ({})** is good, showing consistent performance.",
+        "✅ **ROE ({})** reflects excellent profitability and strong returns for shareholders.",
+    ], "{:.2%}"),
+]